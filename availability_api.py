@@ -0,0 +1,244 @@
+"""
+availability_api.py
+
+Direct interface to the recreation.gov availability API. Requests the monthly availability JSON
+for a campground with aiohttp (no browser required) and counts how many campsites are available
+on each night of the requested stay. Used by the daemon polling loop in place of the Selenium
+scraper so that every campground in the search list can be checked concurrently.
+
+Monthly responses are saved to disk with shelve so that a restarted daemon can reuse responses
+younger than CACHE_TTL on its first poll instead of requesting them all again. Each search has its
+own cache file, since shelve does not support several processes writing the same file. There is no
+in-memory cache between polls: the daemon never polls more often than every CACHE_TTL seconds, and
+a longer TTL would mean alerting on stale availability.
+"""
+
+import asyncio
+import dbm
+import logging
+import os
+import pickle
+import shelve
+from datetime import datetime, timedelta
+from time import time
+from typing import Dict, List, Optional
+import aiohttp
+from campground import Campground, get_search_hash
+
+logger = logging.getLogger(__name__)
+
+RECGOV_AVAILABILITY_URL = "https://www.recreation.gov/api/camps/availability/campground/{}/month"
+AVAILABILITIES_FIELD = "availabilities"
+CAMPSITES_FIELD = "campsites"
+AVAILABLE_STATUS = "Available"
+# recreation.gov rejects requests without a browser-like user agent
+REQUEST_HEADERS = {
+    "accept": "application/json",
+    "user-agent": "Mozilla/5.0 (X11; Linux x86_64) recgov_daemon",
+}
+REQUEST_TIMEOUT = 60
+MAX_CONNECTIONS = 16
+CACHE_TTL = 240                     # seconds a monthly response is considered fresh
+CACHE_PATH_PREFIX = os.path.expanduser("~/.recgov_daemon_cache")
+# a corrupt, locked or unwritable cache file must never count as a campground error; dbm.dumb
+# raises ValueError/SyntaxError while parsing a corrupt index file
+CACHE_ERRORS = (OSError, EOFError, ValueError, SyntaxError, pickle.PickleError, *dbm.error)
+
+_cache_path = None      # this search's cache file, set by init_cache
+_restart_cache = {}     # responses saved by a previous run, used at most once each
+_new_responses = {}     # responses fetched this poll, written to disk by save_cache
+
+def create_session() -> aiohttp.ClientSession:
+    """
+    Initialize aiohttp ClientSession and return it to the caller. Do this in a separate function
+    to allow session (and connection pool) re-use across rounds of polling. Must be called from
+    inside a running event loop.
+
+    :returns: aiohttp ClientSession object
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS),
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        headers=REQUEST_HEADERS)
+
+def get_stay_nights(start_date: datetime, num_days: int) -> List[datetime]:
+    """
+    List each night of the requested stay.
+
+    :param start_date: datetime object identifying the date user wishes to arrive at campground
+    :param num_days: int representation of number of nights user wishes to stay at campground
+    :returns: list of datetime objects, one per night
+    """
+    return [start_date + timedelta(days=day) for day in range(num_days)]
+
+def get_month_starts(nights: List[datetime]) -> List[datetime]:
+    """
+    The availability API only returns one month at a time, so a stay that crosses a month
+    boundary needs more than one request. Find the first day of every month the stay touches.
+
+    :param nights: list of datetime objects, one per night of the stay
+    :returns: sorted list of datetime objects representing the first day of each month
+    """
+    return sorted({night.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+                   for night in nights})
+
+def get_cache_key(facility_id: str, month_start: datetime) -> str:
+    """
+    Build the shelve key for one month of one campground.
+
+    :param facility_id: facility ID of campground
+    :param month_start: datetime object representing the first day of the month
+    :returns: str key
+    """
+    return f"{facility_id}:{month_start.strftime('%Y-%m')}"
+
+def is_fresh(entry, now: float) -> bool:
+    """
+    Check that a cache entry is a (timestamp, campsites) pair younger than CACHE_TTL. Anything
+    else read from disk (e.g. left by an older version or a partial write) counts as expired.
+
+    :param entry: value read from the cache
+    :param now: current time, as returned by time()
+    :returns: True if the entry is well-formed and fresh
+    """
+    return (isinstance(entry, tuple) and len(entry) == 2
+            and isinstance(entry[0], (int, float)) and isinstance(entry[1], dict)
+            and now - entry[0] < CACHE_TTL)
+
+def init_cache(search: Dict, load_saved: bool = True) -> None:
+    """
+    Point the cache at this search's file and load the responses saved by a previous run of the
+    same search that are still within CACHE_TTL. Called once at startup; a missing or unreadable
+    cache file just means every month is requested.
+
+    :param search: dict of the search parameters, used to pick the cache file
+    :param load_saved: read saved responses; if False, responses are only written
+    """
+    global _cache_path  # pylint: disable=global-statement
+    _cache_path = f"{CACHE_PATH_PREFIX}_{get_search_hash(search)}"
+    if not load_saved:
+        return
+    try:
+        with shelve.open(_cache_path) as disk_cache:
+            now = time()
+            _restart_cache.update((key, entry) for key, entry in disk_cache.items()
+                                  if is_fresh(entry, now))
+    except CACHE_ERRORS as exp:
+        logger.warning("Could not read availability cache %s; ignoring it: %s", _cache_path, exp)
+    logger.debug("\tLoaded %d fresh availability responses from disk", len(_restart_cache))
+
+def save_cache() -> None:
+    """
+    Write the responses fetched this poll to disk and remove expired entries so the file doesn't
+    grow with every campground/month ever requested. Blocks on disk I/O, so the daemon calls it
+    in a worker thread once per poll rather than once per request. Does nothing until init_cache
+    has been called.
+    """
+    if not _new_responses or _cache_path is None:
+        return
+    try:
+        with shelve.open(_cache_path) as disk_cache:
+            disk_cache.update(_new_responses)
+            now = time()
+            for key in [key for key, entry in disk_cache.items() if not is_fresh(entry, now)]:
+                del disk_cache[key]
+    except CACHE_ERRORS as exp:
+        logger.warning("Could not write availability cache %s: %s", _cache_path, exp)
+    _new_responses.clear()
+
+def get_cached_month(facility_id: str, month_start: datetime) -> Optional[Dict]:
+    """
+    Look up a monthly response saved by a previous run. Each entry is used at most once, since
+    the next poll is at least CACHE_TTL seconds later and the entry will have expired by then.
+
+    :param facility_id: facility ID of campground
+    :param month_start: datetime object representing the first day of the month
+    :returns: dict of campsite ID -> campsite info if cached and fresh, None otherwise
+    """
+    entry = _restart_cache.pop(get_cache_key(facility_id, month_start), None)
+    if entry is not None and is_fresh(entry, time()):
+        return entry[1]
+    return None
+
+async def fetch_month(session: aiohttp.ClientSession, facility_id: str,
+                      month_start: datetime, use_cache: bool = True) -> Dict:
+    """
+    Request one month of availability for a campground from recreation.gov, unless a fresh copy
+    of the response is already cached.
+
+    :param session: aiohttp ClientSession previously instantiated
+    :param facility_id: facility ID of campground
+    :param month_start: datetime object representing the first day of the month
+    :param use_cache: check the cache before requesting; the response is saved either way
+    :raises aiohttp.ClientResponseError: if request does not return 2xx
+    :raises KeyError: if can't find expected campsites element in resp json
+    :returns: dict of campsite ID -> campsite info (including the availabilities dict)
+    """
+    if use_cache:
+        campsites = get_cached_month(facility_id, month_start)
+        if campsites is not None:
+            logger.debug("\tUsing cached availability for %s (%s)",
+                         facility_id, month_start.strftime("%Y-%m"))
+            return campsites
+
+    url = RECGOV_AVAILABILITY_URL.format(facility_id)
+    params = {"start_date": month_start.strftime("%Y-%m-%dT00:00:00.000Z")}
+    logger.debug("\tGetting %s for %s", url, params["start_date"])
+    async with session.get(url, params=params) as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+    campsites = data[CAMPSITES_FIELD]
+    _new_responses[get_cache_key(facility_id, month_start)] = (time(), campsites)
+    return campsites
+
+def count_available_sites(campsites: Dict, nights: List[datetime]) -> List[int]:
+    """
+    Count the campsites marked available on each night of the stay. Sites do not have to be the
+    same from night to night, matching the behavior of the Selenium scraper.
+
+    :param campsites: dict of campsite ID -> campsite info as returned by the availability API
+    :param nights: list of datetime objects, one per night of the stay
+    :returns: list of int, the number of available sites for each night
+    """
+    night_keys = [night.strftime("%Y-%m-%dT00:00:00Z") for night in nights]
+    counts = [0] * len(night_keys)
+    for campsite in campsites.values():
+        availabilities = campsite[AVAILABILITIES_FIELD]
+        for idx, key in enumerate(night_keys):
+            if availabilities.get(key) == AVAILABLE_STATUS:
+                counts[idx] += 1
+    return counts
+
+async def fetch_avail(session: aiohttp.ClientSession, campground: Campground, start_date: datetime,
+                      num_days: int, use_cache: bool = True) -> List[int]:
+    """
+    Request every month of availability covered by the stay, merge the campsites across months,
+    and count the available sites on each night.
+
+    :param session: aiohttp ClientSession previously instantiated
+    :param campground: Campground object to check
+    :param start_date: datetime object identifying the date user wishes to arrive at campground
+    :param num_days: int representation of number of nights user wishes to stay at campground
+    :param use_cache: reuse cached monthly responses if still fresh
+    :returns: list of int, the number of available sites for each night (all 0 if errored)
+    """
+    nights = get_stay_nights(start_date, num_days)
+    try:
+        months = await asyncio.gather(*[fetch_month(session, campground.facility_id, month_start, use_cache)
+                                        for month_start in get_month_starts(nights)])
+        campsites = {}
+        for month in months:
+            for site_id, campsite in month.items():
+                site = campsites.setdefault(site_id, {AVAILABILITIES_FIELD: {}})
+                site[AVAILABILITIES_FIELD].update(campsite[AVAILABILITIES_FIELD])
+        nightly_counts = count_available_sites(campsites, nights)
+        campground.error_count = 0      # if not errored -> reset error count to 0
+        return nightly_counts
+    # network, HTTP and parsing errors all count against the campground the same way
+    # pylint: disable-next=broad-except
+    except Exception as exp:
+        campground.error_count += 1     # if errored -> inc error count
+        # logger.exception already appends the traceback
+        logger.exception("Campground %s (%s) availability request error!\n%s",
+                         campground.name, campground.facility_id, exp)
+        return [0] * num_days
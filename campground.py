@@ -5,19 +5,38 @@ Class declarations for Campground and CampgroundList. Also contains misc functio
 and keeping track of campground data.
 """
 
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 RECGOV_BASE_URL = "https://www.recreation.gov/camping/campgrounds"
+CHECKPOINT_PATH_PREFIX = os.path.expanduser("~/.recgov_daemon_state")
+MAX_SITE_COUNT = np.iinfo(np.uint8).max     # per-night site counts are stored as uint8
 
+@dataclass(slots=True, eq=False)
 class Campground():
     """
     Taken from https://github.com/CCInCharge/campsite-checker, has been useful for debug.
+    Uses slots since large radius searches can create many of these. Compared by identity (not
+    field values) so that CampgroundList.remove only ever removes the given object.
     """
-    def __init__(self, name="N/A", facility_id=None):
-        self.name = name                                # name of campground
-        self.id = facility_id                           # facility ID of campground
-        self.url = f"{RECGOV_BASE_URL}/{facility_id}"   # recreation.gov URL for campground
-        self.sites_available = 0                        # initialize to unavailable (aka 0)
-        self.error_count = 0                            # initialize parsing error count to 0
-        # self.campsites = {}     # TODO: develop way of storing available specific campsites
+    name: str = "N/A"                   # name of campground
+    facility_id: str = None             # facility ID of campground
+    url: str = field(init=False)        # recreation.gov URL for campground
+    sites_available: int = 0            # initialize to unavailable (aka 0)
+    error_count: int = 0                # initialize parsing error count to 0
+    available: bool = False             # set once the requested stay has been found available
+    # campsites: dict                   # TODO: develop way of storing available specific campsites
+
+    def __post_init__(self):
+        self.url = f"{RECGOV_BASE_URL}/{self.facility_id}"
 
     def pretty(self):
         """
@@ -25,7 +44,7 @@ class Campground():
         """
         # TODO: add self.campsites when available
         retstr = f"Campground:\n\t{self.name}\n"
-        retstr += f"\t{self.id}\n\t{self.url}\n\t{self.sites_available}\n\t{self.error_count}"
+        retstr += f"\t{self.facility_id}\n\t{self.url}\n\t{self.sites_available}\n\t{self.error_count}"
         return retstr
 
     def jsonify(self):
@@ -34,7 +53,7 @@ class Campground():
         """
         json = {
             "name": self.name,
-            "facilityID": self.id,
+            "facilityID": self.facility_id,
             "url": self.url,
             "available": int(self.sites_available),
             "error_count": self.error_count
@@ -47,7 +66,38 @@ class CampgroundList(list):
     Taken from https://github.com/CCInCharge/campsite-checker, has been useful for debug.
     Inherits from list, contains several Campground objects.
     Has a method to return a JSON string representation of its Campgrounds.
+
+    Availability from the latest check is held in avail_matrix, a single uint8 array of shape
+    (number of campgrounds, number of nights) with one row per campground in list order, rather
+    than on each Campground, so that every campground can be evaluated in one NumPy operation.
+    avail_matrix is None until set_availability is called, and is only valid right after that
+    call: append/remove do not keep it in sync with the list.
     """
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.avail_matrix = None
+
+    def set_availability(self, nightly_counts: List[List[int]]) -> None:
+        """
+        Store the number of available sites on each night of the stay for every campground.
+
+        :param nightly_counts: one list of per-night counts per campground, in list order;
+            call again after changing the list, since the matrix is not updated by append/remove
+        """
+        counts = np.array(nightly_counts, dtype=np.int64)
+        if counts.size == 0:    # keep matrix 2D even when there is nothing to store
+            counts = counts.reshape(len(self), 0)
+        self.avail_matrix = counts.clip(0, MAX_SITE_COUNT).astype(np.uint8)
+
+    def newly_available(self, num_sites: int = 1) -> np.ndarray:
+        """
+        Find the campgrounds with at least `num_sites` available sites on every night of the stay.
+
+        :param num_sites: number of campsites required on every night
+        :returns: boolean array, True for each campground (in list order) that is available
+        """
+        return np.all(self.avail_matrix >= num_sites, axis=1)
+
     def serialize(self):
         """
         Make JSON string from Campgrounds list.
@@ -59,3 +109,63 @@ class CampgroundList(list):
         for campground in self:
             result.append(campground.jsonify())
         return result
+
+def get_search_hash(search: Dict) -> str:
+    """
+    Short, stable identifier for a set of search parameters, used to give each search its own
+    files so daemons running different searches at the same time never share or overwrite them.
+
+    :param search: dict of search parameters
+    :returns: str of 12 hex characters
+    """
+    return hashlib.sha1(json.dumps(search, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+def get_checkpoint_path(search: Dict) -> str:
+    """
+    Each search gets its own checkpoint file (see get_search_hash).
+
+    :param search: dict of the search parameters the availability applies to
+    :returns: checkpoint file location for this search
+    """
+    return f"{CHECKPOINT_PATH_PREFIX}_{get_search_hash(search)}.json"
+
+def save_checkpoint(availability: Dict[str, bool], search: Dict) -> None:
+    """
+    Write which campgrounds have been found available so that a restarted daemon does not check
+    them again. Written to a uniquely named temp file and moved into place with os.replace so that
+    a crash mid-write never leaves a truncated checkpoint behind. The checkpoint is optional, so
+    failing to write it is logged rather than raised.
+
+    :param availability: dict of facility ID -> True if found available
+    :param search: dict of the search parameters the availability applies to
+    """
+    path = get_checkpoint_path(search)
+    tmp_path = None
+    try:
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(tmp_fd, "w", encoding="utf-8") as checkpoint_file:
+            json.dump({"search": search, "campgrounds": availability}, checkpoint_file)
+        os.replace(tmp_path, path)
+    except OSError as exp:
+        logger.warning("Could not save checkpoint %s; continuing without it: %s", path, exp)
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_checkpoint(search: Dict) -> Dict[str, bool]:
+    """
+    Read campground availability saved by save_checkpoint for the same search. The search
+    parameters are also stored in the file and checked, in case of a hash collision.
+
+    :param search: dict of the current search parameters
+    :returns: dict of facility ID -> True if found available, empty if no usable checkpoint
+    """
+    try:
+        with open(get_checkpoint_path(search), "r", encoding="utf-8") as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+    except (OSError, ValueError):   # missing or unreadable checkpoint -> start fresh
+        return {}
+    # valid JSON of the wrong shape (e.g. hand-edited) is no more usable than a corrupt file
+    if not isinstance(checkpoint, dict) or checkpoint.get("search") != search:
+        return {}
+    campgrounds = checkpoint.get("campgrounds", {})
+    return campgrounds if isinstance(campgrounds, dict) else {}
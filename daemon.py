@@ -1,29 +1,36 @@
 """
 daemon.py
 
-Main module for recgov daemon. Runs scrape_availabilty methods in a loop to detect new availability
+Main module for recgov daemon. Runs availability_api methods in a loop to detect new availability
 for a list of campgrounds provided by the user or found in RIDB search.
 """
 
 from signal import signal, SIGINT
+import asyncio
 import json
 import logging
+import random
 import argparse
 import smtplib
 import ssl
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
+from queue import Queue
 from typing import List
-from time import sleep
+from time import monotonic, sleep
 from email.message import EmailMessage
-# import asyncio
 # import aiosmtplib
-from selenium.webdriver.chrome.webdriver import WebDriver
-from scrape_availability import create_selenium_driver, scrape_campground
+import aiohttp
+from availability_api import create_session, fetch_avail, init_cache, save_cache
+from scrape_availability import (PAGE_LOAD_WAIT, TUTORIAL_WAIT, close_driver_pool,
+                                 create_driver_pool, scrape_campgrounds)
 from ridb_interface import get_facilities_from_ridb
-from campground import Campground, CampgroundList
-from utils import exit_gracefully, setup_logging
+from campground import (MAX_SITE_COUNT, Campground, CampgroundList, load_checkpoint,
+                        save_checkpoint)
+from utils import exit_gracefully, register_exit_callback, setup_logging
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +47,57 @@ CARRIER_MAP = {
     "uscellular": "email.uscc.net",
 }
 RETRY_WAIT = 300
+MAX_RETRY_WAIT = 1800
+RETRY_JITTER = (0.8, 1.2)
+SMTP_SERVER = "smtp.gmail.com"      # hardcode using gmail for now
+SMTP_PORT = 465                     # implicit TLS via SMTP_SSL
+SMTP_TIMEOUT = 30                   # seconds before a stalled connect/send raises instead of hanging
+ALERT_SEND_INTERVAL = 1.5           # seconds between messages sent on the same SMTP session
+_SSL_CTX = ssl.create_default_context()  # loads the CA bundle once instead of on every connect
+
+_smtp = None                        # authenticated SMTP session shared for daemon's lifetime
+stop_event = asyncio.Event()        # set on SIGINT to end the polling loop
+
+def get_smtp() -> smtplib.SMTP_SSL:
+    """
+    Return the shared SMTP session, connecting and logging in lazily the first time. The session
+    is health-checked with NOOP on every call and transparently re-established if the server has
+    dropped it. Reusing one session avoids paying the TLS handshake + AUTH cost on every alert
+    and avoids Gmail throttling repeated logins.
+
+    :returns: authenticated SMTP_SSL object
+    """
+    global _smtp    # pylint: disable=global-statement
+    if _smtp is not None:
+        try:
+            _smtp.noop()
+            return _smtp
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPException, OSError):
+            logger.info("SMTP session no longer alive; reconnecting.")
+            _smtp = None
+
+    server = smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, context=_SSL_CTX, timeout=SMTP_TIMEOUT)
+    try:
+        server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
+    except smtplib.SMTPException:
+        server.close()
+        raise
+    _smtp = server
+    return _smtp
+
+def close_smtp() -> None:
+    """
+    Close the shared SMTP session if one was opened. Registered as an exit callback so that
+    exit_gracefully logs out of the mail server before the process ends.
+    """
+    global _smtp    # pylint: disable=global-statement
+    if _smtp is not None:
+        try:
+            _smtp.quit()
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPException, OSError):
+            _smtp.close()
+        _smtp = None
+        logger.info("SMTP session closed successfully")
 
 def email_notification(message: EmailMessage) -> None:
     """
@@ -47,7 +105,8 @@ def email_notification(message: EmailMessage) -> None:
     as our email service because that's what we use in development. Another user/dev should
     be able to easily change this configuration.
 
-    Retry sending email 5 times before returning with failure if we can't send an email.
+    Messages are sent over the shared SMTP session from get_smtp. Retry sending email 5 times
+    before returning with failure if we can't send an email.
 
     :param message: EmailMessage object to enable using send_message rather than sendmail.
     :returns: True if notification sent correctly, False otherwise.
@@ -60,18 +119,11 @@ def email_notification(message: EmailMessage) -> None:
     Ref: https://aiosmtplib.readthedocs.io/en/v1.0.6/overview.html#parallel-execution
     """
     logger.info("Sending alert for available campgrounds to %s.", message["To"])
-    smtp_server = "smtp.gmail.com"      # hardcode using gmail for now
-    port = 587                          # ensure starttls
     num_retries = 5
 
     for attempts in range(num_retries):
         try:
-            context = ssl.create_default_context()
-            with smtplib.SMTP(smtp_server, port=port) as server:
-                context = ssl.create_default_context()
-                server.starttls(context=context)
-                server.login(GMAIL_USER, GMAIL_APP_PASSWORD)
-                server.send_message(message)
+            get_smtp().send_message(message)
             break
         except (smtplib.SMTPRecipientsRefused,
                 smtplib.SMTPHeloError,
@@ -79,7 +131,8 @@ def email_notification(message: EmailMessage) -> None:
                 smtplib.SMTPDataError,
                 smtplib.SMTPNotSupportedError,
                 smtplib.SMTPAuthenticationError,
-                smtplib.SMTPException) as exp:
+                smtplib.SMTPException,
+                OSError) as exp:    # DNS failure, connection refused/reset, timeout
             logger.error("FAILURE: could not send email due to the following exception; retrying %d times:\n%s",
                 num_retries-attempts, exp)
     else:  # will run if we didn't break out of the loop, so only failures
@@ -99,16 +152,13 @@ def get_all_campgrounds_by_id(user_facs: List[str]=None, ridb_facs: List[str]=No
     :param ridb_facs: list of str representing facility IDs received from RIDB search
     :returns: CampgroundList object
     """
-    campgrounds_from_facilities = CampgroundList()
     if ridb_facs is not None and user_facs is not None:
-        # check if the user has passed in any duplicate campgrounds to those found in ridb before concatenating lists
-        ridb_facs_ids = [id[1] for id in ridb_facs]
-        for u_fac in user_facs:
-            if u_fac[1] in ridb_facs_ids:
-                logger.debug("\tRemoving facility ID %s from user_facs because \
-                    it is already present in ridb_facs list", u_fac[1])
-                user_facs.remove(u_fac)
-        facilities = user_facs + ridb_facs
+        # drop any user-passed campgrounds already found in ridb before concatenating lists
+        ridb_facs_ids = {fac[1] for fac in ridb_facs}
+        deduped_user_facs = [u_fac for u_fac in user_facs if u_fac[1] not in ridb_facs_ids]
+        logger.debug("\tRemoved %d facility IDs from user_facs because they are already present "
+                     "in ridb_facs list", len(user_facs) - len(deduped_user_facs))
+        facilities = deduped_user_facs + ridb_facs
     elif ridb_facs is None and user_facs is not None:
         facilities = user_facs
     elif user_facs is None and ridb_facs is not None:
@@ -117,47 +167,89 @@ def get_all_campgrounds_by_id(user_facs: List[str]=None, ridb_facs: List[str]=No
         raise ValueError("Both ridb_facs and user_facs are None; check input or ridb output.")
 
     # combine facilities lists and create campground objects for each facility in the list
-    for facility in facilities:
-        logger.debug("\tCreating Campground obect for facility id: %s", facility[1])
-        camp = Campground(name=facility[0], facility_id=facility[1])
-        campgrounds_from_facilities.append(camp)
+    campgrounds_from_facilities = CampgroundList(
+        Campground(name=facility[0], facility_id=facility[1]) for facility in facilities)
+    logger.debug("\tCreated Campground objects for %d facilities", len(campgrounds_from_facilities))
 
     return campgrounds_from_facilities
 
-def compare_availability(selenium_driver: WebDriver, campground_list: CampgroundList, start_date, num_days: int, num_sites: int = 1) -> CampgroundList:
+async def compare_availability(session: aiohttp.ClientSession, campground_list: CampgroundList,
+                               start_date, num_days: int, num_sites: int = 1,
+                               use_cache: bool = True,
+                               driver_pool: Queue = None,
+                               tutorial_wait: float = TUTORIAL_WAIT) -> CampgroundList:
     """
     Given a list of Campground objects, find out if any campgrounds' availability has changed
-    since the last time we looked.
-
-    :param campgrounds: list of Campground objects we want to check against
-    :returns: N/A
+    since the last time we looked. All campgrounds still being searched are requested from the
+    recreation.gov availability API concurrently, or scraped in parallel threads from a pool of
+    Selenium WebDrivers if one is given.
+
+    :param session: aiohttp ClientSession shared across rounds of polling
+    :param campground_list: CampgroundList of Campground objects we want to check against
+    :param use_cache: reuse cached availability responses if still fresh
+    :param driver_pool: Queue of WebDrivers; scrape with Selenium instead of the API if given
+    :param tutorial_wait: seconds each Selenium scrape waits for the tutorial popup
+    :returns: CampgroundList of newly available campgrounds
     """
     available = CampgroundList()
-    for campground in campground_list:
-        logger.debug("\tComparing availability for %s (%s)", campground.name, campground.id)
-        if campground.sites_available:
-            logger.debug("Skipping %s (%s) because an available site already found", campground.name, campground.id)
-            continue
-        campground.sites_available = scrape_campground(selenium_driver, campground, start_date, num_days, num_sites)
-        if campground.sites_available:
-            logger.info("%s (%s) is now available! Adding to email list and removing from active search list.", campground.name, campground.id)
+    pending = CampgroundList(campground for campground in campground_list if not campground.available)
+    if len(pending) == 0:
+        return available
+    if driver_pool is not None:
+        # keep blocking Selenium calls off the event loop; scrape_campgrounds fans out to threads
+        results = await asyncio.to_thread(scrape_campgrounds, driver_pool, pending,
+                                          start_date, num_days, PAGE_LOAD_WAIT, tutorial_wait)
+    else:
+        results = await asyncio.gather(*[fetch_avail(session, campground, start_date, num_days,
+                                                     use_cache)
+                                         for campground in pending])
+        await asyncio.to_thread(save_cache)     # once per poll, off the event loop
+
+    # evaluate every campground's requested nights at once instead of one campground at a time
+    pending.set_availability(results)
+    is_available = pending.newly_available(num_sites)
+    min_sites = pending.avail_matrix.min(axis=1)
+    for campground, found, sites_available in zip(pending, is_available, min_sites):
+        logger.debug("\tComparing availability for %s (%s)", campground.name, campground.facility_id)
+        campground.sites_available = int(sites_available) if found else 0
+        if found:
+            logger.info("%s (%s) is now available! Adding to email list and removing from active search list.", campground.name, campground.facility_id)
             campground.available = True
             available.append(campground)
-            logger.debug("\tAdditional info for new available campground: %s", json.dumps(campground.jsonify()))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("\tAdditional info for new available campground: %s", json.dumps(campground.jsonify()))
             campground_list.remove(campground)
         else:
-            logger.info("%s (%s) is not available, trying again in %s seconds",
-                campground.name, campground.id, RETRY_WAIT)
+            logger.info("%s (%s) is not available, will try again next poll",
+                campground.name, campground.facility_id)
 
         # if campground parsing has errored more than 5 times in a row
         # remove it from the CampgroundList so we can stop checking it and failing
         if campground.error_count > 5:
-            err_msg = f"Campground errored more than 5 times in a row, removing it from list:\n{campground.pretty()}"
-            logger.error(err_msg)
+            logger.error("Campground errored more than 5 times in a row, removing it from list:\n%s",
+                         campground.pretty())
             campground_list.remove(campground)
 
     return available
 
+def build_alert_msg(from_addr: str, to_addr: str, subject: str, content: str) -> EmailMessage:
+    """
+    Build an alert message. The From/To addresses never change while the daemon runs, so they are
+    bound once at startup with functools.partial (see build_email_alert and build_text_alert).
+
+    :param from_addr: address the alert is sent from
+    :param to_addr: address (or carrier gateway address) the alert is sent to
+    :param subject: subject line of the alert
+    :param content: body of the alert
+    :returns: EmailMessage object ready to send
+    """
+    message = EmailMessage()
+    message["From"] = from_addr
+    message["To"] = to_addr
+    message["Subject"] = subject
+    message.set_content(content)
+    return message
+
 def send_alerts(available_campgrounds: CampgroundList) -> None:
     """
     Builds and sends 2 emails:
@@ -166,32 +258,25 @@ def send_alerts(available_campgrounds: CampgroundList) -> None:
 
     :param available_campgrounds: list of newly available sites to send notifications for
     :returns: True if both email and text notifications succeed, False otherwise.
+
+    Blocks on SMTP and on the pause between messages; main_loop runs this in a worker thread.
     """
-    # build email message
-    email_alert_msg = EmailMessage()
-    email_alert_msg["From"] = GMAIL_USER
-    email_alert_msg["To"] = args.email
-    email_alert_msg["Subject"] = f"Alert for \
-        {len(available_campgrounds)} Available Campground on Recreation.gov"
+    # build email message; the campground list is serialized only here, once per alert
     content = "The following campgrounds are now available! Please excuse ugly JSON formatting.\n"
     content += json.dumps(available_campgrounds.serialize(), indent=4)
-    email_alert_msg.set_content(content)
+    email_alert_msg = build_email_alert(
+        f"Alert for {len(available_campgrounds)} Available Campground on Recreation.gov", content)
 
     # build text message
-    num = args.text
-    to_email = CARRIER_MAP[args.carrier]
-    text_alert_msg = EmailMessage()
-    text_alert_msg["From"] = GMAIL_USER
-    text_alert_msg["To"] = f"{num}@{to_email}"
-    text_alert_msg["Subject"] = f"{len(available_campgrounds)} New Campgrounds Available"
-    content = ""
-    for campground in available_campgrounds:
-        content += f"\n{campground.url}"
-    text_alert_msg.set_content(content)
+    content = "".join(f"\n{campground.url}" for campground in available_campgrounds)
+    text_alert_msg = build_text_alert(
+        f"{len(available_campgrounds)} New Campgrounds Available", content)
 
     # send alerts; retry 5 times if doesn't succeed; exit gracefully if fails repeatedly
-    res = email_notification(email_alert_msg) and email_notification(text_alert_msg)
-    return res
+    if not email_notification(email_alert_msg):
+        return False
+    sleep(ALERT_SEND_INTERVAL)  # space out back-to-back messages to stay under Gmail rate limits
+    return email_notification(text_alert_msg)
 
 def parse_start_day(arg: str) -> datetime:
     """
@@ -234,15 +319,33 @@ def validate_carrier(arg:str) -> str:
 
 def validate_num_sites(arg:str) -> int:
     """
-    Number of campsites has to be an integer >= 1 for sanity's sake.
+    Number of campsites has to be an integer >= 1 for sanity's sake, and no more than
+    MAX_SITE_COUNT, the largest per-night count CampgroundList stores.
 
     :param arg: user-entered number of sites
-    :returns: integer >= 1
+    :returns: integer between 1 and MAX_SITE_COUNT
     """
     arg = int(arg)
     if arg < 1:
         logger.error("User input for number of campsites (%d) too small (must be > 1)", arg)
         sys.exit(1)
+    if arg > MAX_SITE_COUNT:
+        logger.error("User input for number of campsites (%d) too large (must be <= %d)",
+                     arg, MAX_SITE_COUNT)
+        sys.exit(1)
+    return arg
+
+def validate_num_days(arg:str) -> int:
+    """
+    Number of days has to be an integer >= 1, otherwise there are no nights to check.
+
+    :param arg: user-entered number of days
+    :returns: integer >= 1
+    """
+    arg = int(arg)
+    if arg < 1:
+        logger.error("User input for number of days (%d) too small (must be > 1)", arg)
+        sys.exit(1)
     return arg
 
 def run():
@@ -250,48 +353,178 @@ def run():
     Run the daemon after SIGINT has been captured and arguments have been parsed.
     """
     # validate lat/lon/radius arguments prior to checking RIDB and forming CampgroundList
-    ridb_args = {args.lat, args.lon, args.radius}
-    ridb_facilities = None
-    if None not in ridb_args:
-        ridb_facilities = get_facilities_from_ridb(args.lat, args.lon, args.radius)
-    elif None in ridb_args and (args.lat is not None or
-                                args.lon is not None or
-                                args.radius is not None):
-        ridb_args_error_msg = ("daemon.py:__main__: At least one RIDB argument was passed but at ",
-                               "least one RIDB arg is missing or None; combination fails. Check ",
+    # use a tuple rather than a set: a set would collapse equal values (e.g. lat == lon)
+    ridb_args = (args.lat, args.lon, args.radius)
+    num_ridb_args = sum(arg is not None for arg in ridb_args)
+    ridb_args_valid = num_ridb_args == len(ridb_args)
+    if num_ridb_args not in (0, len(ridb_args)):
+        ridb_args_error_msg = ("daemon.py:__main__: At least one RIDB argument was passed but at "
+                               "least one RIDB arg is missing or None; combination fails. Check "
                                "CLI args and try again.")
         raise ValueError(ridb_args_error_msg)
+
+    # RIDB search is a network call and WebDriver startup launches browsers, so overlap the two
+    # to make startup take max(RIDB, WebDriver) instead of their sum
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ridb_future = None
+        if ridb_args_valid:
+            ridb_future = executor.submit(get_facilities_from_ridb, *ridb_args)
+        pool_future = executor.submit(create_driver_pool) if args.use_selenium else None
+
+        driver_pool = pool_future.result() if pool_future is not None else None
+        if driver_pool is not None:
+            register_exit_callback(partial(close_driver_pool, driver_pool))
+        try:
+            ridb_facilities = ridb_future.result() if ridb_future is not None else None
+        except Exception:
+            if driver_pool is not None:     # don't leave browsers running if RIDB search fails
+                close_driver_pool(driver_pool)
+            raise
     search_list = get_all_campgrounds_by_id(args.campground_ids, ridb_facilities)
-    logger.info(json.dumps(search_list.serialize(), indent=2))
-
-    driver = create_selenium_driver()
-
-    # check campground availability until stopped by user OR start_date has passed
-    # OR no more campgrounds in search_list
-    while True:
-        if args.start_date < datetime.now():
-            logger.info("Desired start date has passed, ending process...")
-            exit_gracefully(None, None, driver)
-        available = compare_availability(driver, search_list,
-            args.start_date, args.num_days, args.num_sites)
-        if len(available) > 0:
-            if not send_alerts(available):
-                exit_gracefully(None, None, driver)
-        if len(search_list) == 0:
-            logger.info(("All campgrounds to be searched have either been found or ",
-                        "encountered multiple errors, ending process..."))
-            exit_gracefully(None, None, driver)
-        sleep(RETRY_WAIT)  # sleep for RETRY_WAIT time before checking search_list again
+
+    # skip campgrounds a previous run of the same search already found available
+    checkpoint = load_checkpoint(get_search_params())
+    for campground in search_list:
+        if checkpoint.get(campground.facility_id):
+            logger.info("%s (%s) already found available by a previous run; skipping",
+                        campground.name, campground.facility_id)
+            campground.available = True
+    search_list = CampgroundList(campground for campground in search_list if not campground.available)
+    logger.info("Searching campgrounds:\n%s", json.dumps(search_list.serialize(), indent=2))
+
+    init_cache(get_search_params(), load_saved=not args.force_rescrape)
+    asyncio.run(main_loop(search_list, driver_pool, checkpoint))
+
+def get_search_params() -> dict:
+    """
+    Collect the arguments that determine whether a campground counts as available, used to
+    name this search's checkpoint and cache files and to check that a saved checkpoint applies
+    to the current search.
+
+    :returns: dict of search parameters
+    """
+    return {
+        "start_date": args.start_date.strftime("%m/%d/%Y"),
+        "num_days": args.num_days,
+        "num_sites": args.num_sites,
+    }
+
+def get_retry_wait(consecutive_empty_polls: int) -> float:
+    """
+    Back off exponentially while polls keep coming back empty, capped at MAX_RETRY_WAIT, and add
+    random jitter so that we don't hit recreation.gov on a perfectly regular schedule.
+
+    :param consecutive_empty_polls: number of polls in a row that found no new availability
+    :returns: number of seconds to wait before polling again
+    """
+    # cap before jittering too, so the exponent can't grow past what a float can hold
+    wait = min(RETRY_WAIT * 2**consecutive_empty_polls, MAX_RETRY_WAIT)
+    return min(wait * random.uniform(*RETRY_JITTER), MAX_RETRY_WAIT)
+
+def request_stop() -> None:
+    """
+    SIGINT handler while main_loop is running. The first CTRL-C sets stop_event so that main_loop
+    cancels what it is doing and exits gracefully; a second one exits right away, in case that
+    is taking too long.
+    """
+    if stop_event.is_set():
+        exit_gracefully(None, None)
+    stop_event.set()
+
+async def run_until_stopped(coro):
+    """
+    Run a coroutine as a task and wait for it together with stop_event, cancelling it if the
+    daemon is stopped first. Cancelling a coroutine started with asyncio.to_thread only stops
+    waiting on the thread; SMTP_TIMEOUT and quitting the WebDrivers on exit keep it short-lived.
+
+    :param coro: coroutine to run, e.g. a poll or an alert send
+    :returns: result of the coroutine, or None if stop_event was set before it finished
+    """
+    task = asyncio.ensure_future(coro)
+    stop_task = asyncio.ensure_future(stop_event.wait())
+    done, _ = await asyncio.wait({task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+    stop_task.cancel()
+    if task in done:
+        return task.result()
+    logger.info("Stop requested; cancelling current poll/alert.")
+    task.cancel()
+    try:
+        await task      # let the task finish cancelling (e.g. close its HTTP requests)
+    except asyncio.CancelledError:
+        pass
+    return None
+
+async def main_loop(search_list: CampgroundList, driver_pool: Queue = None,
+                    checkpoint: dict = None):
+    """
+    Check campground availability until stopped by user OR start_date has passed OR no more
+    campgrounds in search_list. One aiohttp session is shared by every round of polling.
+
+    While the loop is running, SIGINT sets stop_event instead of exiting immediately (see
+    request_stop). Each poll, each alert send and the wait between polls is raced against
+    stop_event, so whichever is in progress is cancelled right away and the session can be closed
+    before exiting.
+
+    :param search_list: CampgroundList of campgrounds to search
+    :param driver_pool: Queue of WebDrivers to scrape with instead of the availability API
+    :param checkpoint: dict of facility ID -> availability loaded at startup; updated and saved
+        to disk after every poll
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(SIGINT, request_stop)
+    except NotImplementedError:     # Windows event loops don't support add_signal_handler
+        signal(SIGINT, lambda signal_received, frame: loop.call_soon_threadsafe(request_stop))
+    checkpoint = {} if checkpoint is None else checkpoint
+    consecutive_empty_polls = 0
+    # start_date never changes, so compute once when it passes on the monotonic clock
+    deadline = monotonic() + (args.start_date - datetime.now()).total_seconds()
+    async with create_session() as session:
+        while not stop_event.is_set():
+            if monotonic() >= deadline:
+                logger.info("Desired start date has passed, ending process...")
+                break
+            available = await run_until_stopped(compare_availability(session, search_list,
+                args.start_date, args.num_days, args.num_sites, not args.force_rescrape,
+                driver_pool, args.tutorial_wait))
+            if available is None:
+                break
+            if len(available) > 0:
+                consecutive_empty_polls = 0
+                # SMTP connect/login and the pause between messages block, so keep them off the loop
+                # None (stopped) also ends the loop, before the checkpoint marks the alert as sent
+                if not await run_until_stopped(asyncio.to_thread(send_alerts, available)):
+                    break
+            # checkpoint only after alerts are sent, so a restart never skips an unsent alert
+            checkpoint.update((campground.facility_id, campground.available)
+                              for campground in search_list + available)
+            # file write blocks, so do it off the loop like the cache write; pass a copy so the
+            # worker thread never sees checkpoint change mid-dump
+            await asyncio.to_thread(save_checkpoint, dict(checkpoint), get_search_params())
+            if len(search_list) == 0:
+                logger.info("All campgrounds to be searched have either been found or "
+                            "encountered multiple errors, ending process...")
+                break
+            wait = get_retry_wait(consecutive_empty_polls)
+            if len(available) == 0:
+                consecutive_empty_polls += 1
+            logger.info("Checking search list again in %d seconds", wait)
+            try:    # wait before checking search_list again, unless stopped in the meantime
+                await asyncio.wait_for(stop_event.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+    exit_gracefully(None, None)
 
 if __name__ == "__main__":
     signal(SIGINT, exit_gracefully)     # add custom handler for SIGINT/CTRL-C
+    register_exit_callback(close_smtp)  # log out of shared SMTP session on exit
     ARG_DESC = """Daemon to check recreation.gov and RIDB for new campground availability and send notification email
         when new availability found."""
     parser = argparse.ArgumentParser(description=ARG_DESC)
     parser.add_argument("-s", "--start_date", type=parse_start_day, required=True,
         help="First day you want to reserve a site, represented as Month/Day/Year (e.g. 05/19/2021).")
-    parser.add_argument("-n", "--num_days", type=int, required=True,
-        help="Number of days you want to camp (e.g. 2).")
+    parser.add_argument("-n", "--num_days", type=validate_num_days, required=True,
+        help="Number of days you want to camp (e.g. 2); validated to be >0.")
     parser.add_argument("-e", "--email", type=str, required=True,
         help="Email address at which you want to receive notifications (ex: first.last@example.com).")
     parser.add_argument("-t", "--text", type=str, required=True,
@@ -306,8 +539,17 @@ if __name__ == "__main__":
         help="Radius in miles of the area you want to search, centered on lat/lon (e.g. 25).")
     parser.add_argument("--campground_ids", type=parse_id_args,
         help="Comma-separated list of campground facility IDs you want to check (e.g. `233116,231962`).")
-    parser.add_argument("--num_sites", type=validate_num_sites,
-        help="Number of campsites you need at each campground; defaults to 1, validated to be >0.")
+    parser.add_argument("--num_sites", type=validate_num_sites, default=1,
+        help=f"Number of campsites you need at each campground; defaults to 1, validated to be between 1 and {MAX_SITE_COUNT}.")
+    parser.add_argument("--force_rescrape", action="store_true",
+        help="Always request fresh availability from recreation.gov instead of reusing responses cached by a previous run.")
+    parser.add_argument("--use_selenium", action="store_true",
+        help="Scrape recreation.gov pages with a pool of headless Chromium WebDrivers instead of using the availability API.")
+    parser.add_argument("--tutorial_wait", type=float, default=TUTORIAL_WAIT,
+        help=f"Seconds each --use_selenium scrape waits for the tutorial popup; defaults to {TUTORIAL_WAIT}. "
+             "Raise it on slow hosts if the popup is missed, lower it to speed up scraping.")
     args = parser.parse_args()
+    build_email_alert = partial(build_alert_msg, GMAIL_USER, args.email)
+    build_text_alert = partial(build_alert_msg, GMAIL_USER, f"{args.text}@{CARRIER_MAP[args.carrier]}")
     setup_logging()
     run()
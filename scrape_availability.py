@@ -6,11 +6,12 @@ webdriver and with beautifulsoup after selenium has retrieved the availability t
 """
 
 import logging
-import traceback
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
 from signal import signal, SIGINT
 from datetime import datetime, timedelta
 from time import sleep
-from typing import Tuple
+from typing import List, Tuple
 from pandas.core.frame import DataFrame
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -20,7 +21,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.options import Options
 from campground import Campground
 from utils import exit_gracefully, setup_logging
@@ -34,10 +35,16 @@ START_DATE_ERROR_TAG_NAME = "campground-start-date-calendar-error"
 END_DATE_INPUT_TAG_NAME = "campground-end-date-calendar"
 END_DATE_ERROR_TAG_NAME = "campground-end-date-calendar-error"
 AVAILABILITY_TABLE_TAG_NAME = "availability-table"
+AVAILABILITY_TABLE_ROWS_CSS = f"#{AVAILABILITY_TABLE_TAG_NAME} tbody tr"
 TABLE_LOADING_TAG_CLASS = "rec-table-overlay-loading"
 CAMP_LOCATION_NAME_ICON = "camp-location-name--icon"
 TUTORIAL_CLOSE_BUTTON_XPATH = "/html/body/div[11]/div/div/div/div/div/div/div/button"
 PAGE_LOAD_WAIT = 60
+# the tutorial popup isn't always shown, so every scrape without it waits this long for nothing;
+# slower hosts (e.g. a Raspberry Pi) may need longer for it to render, see --tutorial_wait
+TUTORIAL_WAIT = 5
+POOL_SIZE = 4
+REMOTE_DEBUGGING_PORT = 9222
 
 def parse_html_table(table: BeautifulSoup) -> DataFrame:
     """
@@ -71,16 +78,15 @@ def parse_html_table(table: BeautifulSoup) -> DataFrame:
             df.iat[row_idx,cell_idx] = cell.get_text()
     return df
 
-def all_dates_available(df: DataFrame, start_date: datetime,
-        num_days: int, req_available_sites: int = 1) -> bool:
+def count_available_sites_in_table(df: DataFrame, start_date: datetime, num_days: int) -> List[int]:
     """
     Parse pandas DataFrame for the specific date columns matching the start date and number
-    of nights we want to stay, search for 'A' string in df cells. Return True if every column
-    has an availability (inlcuding if the daily availabilities are in different sites/rows).
+    of nights we want to stay, and count the 'A' string cells in each of those columns. Daily
+    availabilities do not have to be in the same sites/rows.
 
     :param df: pandas DataFrame parsed from recreation.gov campground website
-    :returns: minimum number of available campsites over the requested period if every relevant
-        date column contains at least `num_sites` available 'A' cell(s), False otherwise
+    :raises KeyError: if the requested dates don't appear as columns in the table
+    :returns: list of int, the number of available campsites for each night of the stay
     """
     # get column names corresponding to days we want to stay at the campground
     abbr_dates = []
@@ -89,59 +95,101 @@ def all_dates_available(df: DataFrame, start_date: datetime,
         abbr_date_str = abbr_date.strftime("%a%-d")
         abbr_dates.append(abbr_date_str)
 
-    # cycle through date columns to check if there's at least `req_available_sites` for each day
-    tmp = 100
-    at_least_one_available = True
     if not set(abbr_dates).issubset(set(df.columns)):
         key_error_str = (f"Dates requested {abbr_dates} don't appear as columns in table; "
                           "either search has failed or requested dates are not in season.")
         raise KeyError(key_error_str)
-    for col in df[abbr_dates].columns:
-        num_available_sites = 0
-        try:
-            num_available_sites = df[col].value_counts()["A"]
-        except KeyError:    # there are no "A" fields -> none available
-            short_circuit_log_msg = (f"Found column (aka date) with no 'A' cells, meaning no "
-                                     f"sites available ({req_available_sites} required); "
-                                     "short-circuit this search of table")
-            logger.debug(short_circuit_log_msg)
-            return False
-        at_least_one_available = num_available_sites >= req_available_sites
-        if not at_least_one_available:
-            short_circuit_log_msg = (f"Found column (aka date) with only {num_available_sites} "
-                                     f"sites available ({req_available_sites} required); "
-                                     "short-circuit this search of table")
-            logger.debug(short_circuit_log_msg)
-            return False
-        if num_available_sites < tmp:
-            tmp = num_available_sites
-
-    return num_available_sites
-
-def create_selenium_driver(headless: bool=True) -> WebDriver:
+    return [int((df[col] == "A").sum()) for col in abbr_dates]
+
+def create_selenium_driver(headless: bool=True,
+                           debugging_port: int=REMOTE_DEBUGGING_PORT) -> WebDriver:
     """
     Initialize Selenium WebDriver object and return it to the caller. Do this in a separate
     function to allow driver re-use across rounds of scraping.  Note: the remote debugging port
     option seems to be required for raspberry pi operation: https://stackoverflow.com/a/56638103
 
+    No implicit wait is set on the driver; every lookup in scrape_campground uses an explicit
+    WebDriverWait so it returns as soon as the element is ready (and mixing the two wait types
+    makes explicit waits unreliable: https://stackoverflow.com/a/45420111).
+
     :param headless: create GUI for WebDriver? Testing usage passes in False, defaults to True
+    :param debugging_port: remote debugging port; must be unique per concurrently running driver
     :returns: Selenium WebDriver object
     """
     options = Options()
     options.add_argument("enable-automation")               # necessary for driving Chromium actions
     if headless:
         options.add_argument("--headless")
-    options.add_argument("--remote-debugging-port=9222")    # necessary for driving Chromium actions
+    options.add_argument(f"--remote-debugging-port={debugging_port}")  # necessary for driving Chromium actions
     options.binary_location = "/usr/bin/chromium-browser"   # browser is Chromium instead of Chrome
     driver_path = "/usr/lib/chromium-browser/chromedriver"  # we use custom chromedriver for rpi
     driver = webdriver.Chrome(options=options, service=Service(driver_path))
-    driver.implicitly_wait(PAGE_LOAD_WAIT)
     return driver
 
-def wait_for_page_element_load(driver: WebDriver, elem_id: str):
+class DriverPool(Queue):
+    """
+    Queue of idle WebDrivers that also remembers every driver it was created with, so that
+    close_driver_pool can quit drivers that are currently borrowed by a scrape.
+    """
+    def __init__(self, drivers: List[WebDriver]):
+        super().__init__()
+        self.drivers = list(drivers)
+        for driver in self.drivers:
+            self.put(driver)
+
+def quit_driver(driver: WebDriver) -> None:
+    """
+    Quit a WebDriver, logging rather than raising if the browser or chromedriver is already gone,
+    so that one failure never keeps the remaining browsers running.
+
+    :param driver: Selenium WebDriver object
+    """
+    try:
+        driver.quit()
+    except (WebDriverException, OSError) as exp:
+        logger.warning("Could not quit WebDriver: %s", exp)
+
+def create_driver_pool(pool_size: int=POOL_SIZE) -> DriverPool:
+    """
+    Initialize several headless WebDrivers so that campgrounds can be scraped in parallel. Each
+    driver is its own Chromium process, so scraping from separate threads scales close to
+    linearly up to pool_size. The browsers are launched concurrently for the same reason.
+
+    :param pool_size: number of WebDrivers to create
+    :returns: DriverPool of Selenium WebDriver objects
+    """
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        futures = [executor.submit(create_selenium_driver,
+                                   debugging_port=REMOTE_DEBUGGING_PORT + idx)
+                   for idx in range(pool_size)]
+    # leaving the executor waits for every launch, so no driver can still be starting here
+    errors = [future.exception() for future in futures if future.exception() is not None]
+    drivers = [future.result() for future in futures if future.exception() is None]
+    if errors:
+        # don't leave the browsers that did start running, caller never gets a pool to close
+        for driver in drivers:
+            quit_driver(driver)
+        raise errors[0]
+    return DriverPool(drivers)
+
+def close_driver_pool(driver_pool: DriverPool) -> None:
     """
-    Force WebDriver to wait for element to load before continuing. Timeout of PAGE_LOAD_WAIT
-    (defaults to 60s).
+    Quit every WebDriver created for the pool, including any still borrowed by a scrape (which
+    then fails and is counted as a campground error). Use quit instead of close to avoid leftover
+    chrome processes. Safe to call more than once.
+
+    :param driver_pool: DriverPool of Selenium WebDriver objects
+    """
+    while not driver_pool.empty():
+        driver_pool.get()
+    while driver_pool.drivers:
+        quit_driver(driver_pool.drivers.pop())
+    logger.info("WebDriver pool quit successfully")
+
+def wait_for_page_element_load(driver: WebDriver, elem_id: str, timeout: int = PAGE_LOAD_WAIT):
+    """
+    Force WebDriver to wait for element to load before continuing. Timeout defaults to
+    PAGE_LOAD_WAIT (60s).
 
     Use EC.visibility_of_element_located instead of EC.presence_of_element_located because table
     must be visible to be populated. See below for explanation of selenium wait types:
@@ -149,10 +197,11 @@ def wait_for_page_element_load(driver: WebDriver, elem_id: str):
 
     :param driver: WebDriver object we are forcing to wait
     :param elem_id: element id string we want to wait for
+    :param timeout: max number of seconds to wait for the element
     :returns: WebDriver element that has correctly loaded
     """
     try:
-        return WebDriverWait(driver, PAGE_LOAD_WAIT).until(
+        return WebDriverWait(driver, timeout).until(
                 EC.visibility_of_element_located((By.ID, elem_id)))
     except TimeoutException:
         logger.exception("Loading %s element on page took too much time; skipping this load.",
@@ -183,7 +232,7 @@ def is_bad_date(driver: WebDriver, element_id) -> Tuple[bool, str]:
     date_error_msg = driver.find_element(by=By.ID, value=element_id)
     invalid_str = "not valid"
     unavailable_str = "not available"
-    logger.info(date_error_msg.text)
+    logger.info("%s", date_error_msg.text)
     if date_error_msg is not None:
         if unavailable_str in date_error_msg.text:
             return (True, unavailable_str)
@@ -193,11 +242,12 @@ def is_bad_date(driver: WebDriver, element_id) -> Tuple[bool, str]:
     return (False, "all good")
 
 def scrape_campground(driver: WebDriver, campground: Campground, start_date: datetime,
-                      num_days: int, num_sites: int = 1) -> bool:
+                      num_days: int, timeout: int = PAGE_LOAD_WAIT,
+                      tutorial_wait: float = TUTORIAL_WAIT) -> List[int]:
     """
     Use Selenium WebDriver to load page, input desired start date, identify availability table
-    for new data, use BeautifulSoup to parse html table, and use pandas DataFrame to identify
-    availability inside the parsed table.
+    for new data, use BeautifulSoup to parse html table, and use pandas DataFrame to count
+    available sites for each night inside the parsed table.
 
     Use Selenium's send_keys functionality to enter start date, see below for info:
         https://selenium-python.readthedocs.io/api.html#module-selenium.webdriver.common.keys
@@ -211,69 +261,111 @@ def scrape_campground(driver: WebDriver, campground: Campground, start_date: dat
           which prevents us from clearing it. This way, we put in the date, backtrack to
           delete the old date, and then manually refresh the table. Works on mac/linux
           and headless/nonheadless.
+    Note on waits: never sleep for a fixed time here. Every step waits explicitly with
+    WebDriverWait for the element it needs (ending with the availability table rows becoming
+    visible), so the call returns as soon as the page is ready and `timeout` is only an upper
+    bound per step. The one exception is the tutorial popup, which may never appear: waiting for
+    it always costs up to `tutorial_wait` seconds when it doesn't.
 
     :param driver: WebDriver object previously instantiated
     :param campground: Campground object; url field will be loaded with driver
     :param start_date: datetime object identifying the date user wishes to arrive at campground
     :param num_days: int representation of number of nights user wishes to stay at campground
-    :returns: True if start_date/num_days are available, False otherwise
+    :param timeout: max number of seconds to wait for each page element
+    :param tutorial_wait: max number of seconds to wait for the tutorial popup to appear
+    :returns: list of int, the number of available sites for each night (all 0 if errored)
     """
+    no_availability = [0] * num_days
     try:
         logger.debug("\tGetting campground.url (%s) with driver", campground.url)
         driver.get(campground.url)
 
         try:
             # check for tutorial window, close if present, otherwise table doesn't load correctly
-            tutorial_close_button = driver.find_element(
-                by=By.XPATH, value=TUTORIAL_CLOSE_BUTTON_XPATH)
+            tutorial_close_button = WebDriverWait(driver, tutorial_wait).until(
+                EC.element_to_be_clickable((By.XPATH, TUTORIAL_CLOSE_BUTTON_XPATH)))
             logger.debug("\tClosing tutorial window")
             tutorial_close_button.click()
-        except NoSuchElementException:
+        except TimeoutException:
             # we don't actually care if tutorial didn't appear, just move on
             logger.debug("\tNo tutorial this time")
 
         logger.debug("\tFinding input box tag")
-        start_date_input = wait_for_page_element_load(driver, START_DATE_INPUT_TAG_NAME)
+        start_date_input = wait_for_page_element_load(driver, START_DATE_INPUT_TAG_NAME, timeout)
         if start_date_input is None:  # if wait for page element load fails -> abandon check
-            return False
+            return no_availability
         logger.debug("\tInputting start/end dates with send_keys")
         enter_date_input(start_date, start_date_input)
 
         end_date = start_date + timedelta(days=num_days)
-        end_date_input = wait_for_page_element_load(driver, END_DATE_INPUT_TAG_NAME)
+        end_date_input = wait_for_page_element_load(driver, END_DATE_INPUT_TAG_NAME, timeout)
         if end_date_input is None:  # if wait for page element load fails -> abandon check
-            return False
+            return no_availability
         enter_date_input(end_date, end_date_input)
 
         # wait for table loading spinning wheel to disappear, otherwise table contents are NaN
         # https://stackoverflow.com/a/29084080 -- wait for element to *not* be visible
         # https://stackoverflow.com/a/51884408 -- wait for element not to be visible even though it
         # may already be invisible
-        # https://stackoverflow.com/a/45420111 -- temporarily kill implicit waits to make explicit
-        # wait work corectly
-        driver.implicitly_wait(0)
-        WebDriverWait(driver, PAGE_LOAD_WAIT).until(EC.invisibility_of_element_located(
+        WebDriverWait(driver, timeout).until(EC.invisibility_of_element_located(
             (By.CLASS_NAME, TABLE_LOADING_TAG_CLASS)))
-        driver.implicitly_wait(PAGE_LOAD_WAIT)
 
         logger.debug("\tFinding availability table tag")
-        availability_table = wait_for_page_element_load(driver, AVAILABILITY_TABLE_TAG_NAME)
-        if availability_table is None:  # if page load wait fails -> abandon check immediately
-            return False
+        try:
+            # table is only worth parsing once its rows have rendered
+            WebDriverWait(driver, timeout).until(EC.visibility_of_element_located(
+                (By.CSS_SELECTOR, AVAILABILITY_TABLE_ROWS_CSS)))
+        except TimeoutException:    # if page load wait fails -> abandon check immediately
+            logger.exception("Loading availability table rows took too much time; skipping this load.")
+            return no_availability
+        availability_table = driver.find_element(by=By.ID, value=AVAILABILITY_TABLE_TAG_NAME)
         table_html = availability_table.get_attribute('outerHTML')
         soup = BeautifulSoup(table_html, 'html.parser')
         df = parse_html_table(soup)
-        num_sites_available = all_dates_available(df, start_date, num_days, num_sites)
+        nightly_counts = count_available_sites_in_table(df, start_date, num_days)
         campground.error_count = 0      # if not errored -> reset error count to 0
-        return num_sites_available
+        return nightly_counts
     # don't usually want to ignore these, but this block is so huge it's unavoidable for now
     # pylint: disable-next=broad-except
     except Exception as exp:
         campground.error_count += 1     # if errored -> inc error count
+        # logger.exception already appends the traceback
         logger.exception("Campground %s (%s) parsing error!\n%s",
-                         campground.name, campground.id, exp)
-        logger.exception(str(traceback.format_exc()))
-        return False
+                         campground.name, campground.facility_id, exp)
+        return no_availability
+
+def scrape_campground_from_pool(driver_pool: Queue, campground: Campground, start_date: datetime,
+                                num_days: int, timeout: int = PAGE_LOAD_WAIT,
+                                tutorial_wait: float = TUTORIAL_WAIT) -> List[int]:
+    """
+    Borrow a WebDriver from the pool for the duration of one scrape_campground call. Blocks until
+    a driver is free, so at most pool-size campgrounds are scraped at the same time.
+
+    :param driver_pool: Queue of Selenium WebDriver objects
+    :returns: result of scrape_campground
+    """
+    driver = driver_pool.get()
+    try:
+        return scrape_campground(driver, campground, start_date, num_days, timeout, tutorial_wait)
+    finally:
+        driver_pool.put(driver)
+
+def scrape_campgrounds(driver_pool: Queue, campgrounds: List[Campground], start_date: datetime,
+                       num_days: int, timeout: int = PAGE_LOAD_WAIT,
+                       tutorial_wait: float = TUTORIAL_WAIT) -> List[List[int]]:
+    """
+    Scrape several campgrounds in parallel, one worker thread per pooled WebDriver. Selenium calls
+    are blocking, so threads (rather than asyncio) are used to fan out.
+
+    :param driver_pool: Queue of Selenium WebDriver objects
+    :param campgrounds: list of Campground objects to scrape
+    :returns: list of scrape_campground results, in the same order as campgrounds
+    """
+    with ThreadPoolExecutor(max_workers=driver_pool.qsize()) as executor:
+        futures = [executor.submit(scrape_campground_from_pool, driver_pool, campground,
+                                   start_date, num_days, timeout, tutorial_wait)
+                   for campground in campgrounds]
+        return [future.result() for future in futures]
 
 def run():
     """
@@ -289,7 +381,7 @@ def run():
     mcgill_campground = Campground(name="McGill", facility_id="231962")
 
     driver = create_selenium_driver(headless=True)
-    if scrape_campground(driver, mcgill_campground, mcgill_start_date, num_days, num_sites):
+    if min(scrape_campground(driver, mcgill_campground, mcgill_start_date, num_days)) >= num_sites:
         logger.info("WE HAVE SOMETHING AVAILABLE!")
     else:
         logger.info("sad")
@@ -6,11 +6,24 @@ fill this out later
 
 import sys
 import logging
+from typing import Callable
 from logging.handlers import TimedRotatingFileHandler
 from selenium.webdriver.chrome.webdriver import WebDriver
 
 logger = logging.getLogger(__name__)
 
+_exit_callbacks = []
+
+def register_exit_callback(callback: Callable[[], None]) -> None:
+    """
+    Register a function for exit_gracefully to call before the process exits. Used to clean up
+    long-lived resources (e.g. network sessions) that outlive a single round of polling.
+
+    :param callback: function taking no arguments
+    :returns: N/A
+    """
+    _exit_callbacks.append(callback)
+
 # pylint: disable-next=unused-argument
 def exit_gracefully(signal_received, frame, close_this_driver: WebDriver=None):
     """
@@ -23,14 +36,15 @@ def exit_gracefully(signal_received, frame, close_this_driver: WebDriver=None):
     :param driver: Selenium WebDriver to close before exiting
     :returns: N/A
     """
-    exit_msg = ("Received CTRL-C/SIGNINT or daemon completed;",
+    logger.info("Received CTRL-C/SIGNINT or daemon completed; "
                 "exiting gracefully/closing WebDriver if initialized.")
-    logger.info(exit_msg)
     if close_this_driver is not None:
         # use quit instead of close to avoid tons of leftover chrome processes
         # https://stackoverflow.com/questions/15067107/difference-between-webdriver-dispose-close-and-quit
         close_this_driver.quit()
         logger.info("WebDriver Quit Successfully")
+    for callback in _exit_callbacks:
+        callback()
     sys.exit(0)
 
 def set_low_network_quality(driver: WebDriver) -> None:
@@ -72,6 +86,11 @@ def setup_logging() -> None:
     - will save logs for 7 days max
     - saves to a local logs/ directory inside this repo (excluded from git) because doing so
         elsewhere does not guarantee user will have permissions to create files
+    - only keeps WARNING and above from selenium and urllib3, which otherwise log every
+        WebDriver command/HTTP request
+
+    All log calls in this project pass arguments lazily (`logger.debug("... %s", arg)`, never
+    f-strings) so that suppressed messages are never formatted.
 
     Refs used to create this:
     - https://gist.github.com/gene1wood/73b715434c587d2240c21fc83fad7962
@@ -92,3 +111,5 @@ def setup_logging() -> None:
         level=logging.INFO,
         format="[%(asctime)s] %(levelname)-8s [%(filename)s:%(lineno)d:%(funcName)s] %(message)s",
     )
+    logging.getLogger("selenium").setLevel(logging.WARNING)
+    logging.getLogger("urllib3").setLevel(logging.WARNING)